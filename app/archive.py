@@ -0,0 +1,406 @@
+import fcntl
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func
+
+from .database import init_db, SessionLocal
+from .models import NutritionLog, LabResult, TextRecord, DailyRollup, ArchivePart
+from .serialization import (
+    NUTRITION_LOG_FIELDS,
+    LAB_RESULT_FIELDS,
+    TEXT_RECORD_FIELDS,
+    columns,
+    dumps,
+)
+
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+
+# Rows older than this many days are moved out of the hot tables.
+RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "90"))
+
+# db_index() and food_index read the last 7 days of meals (and /daily_calorie
+# today's) from the hot table only, so the horizon may never be shorter.
+MIN_RETENTION_DAYS = 7
+
+# Nutrition columns summed into daily_rollups.
+NUTRIENTS = ("calories", "protein", "fats", "carbs")
+
+# Archived tables: model, the column used for the horizon and month partitioning,
+# the projection written to disk (the same one the list endpoints return), and
+# the Parquet schema for that projection.
+ARCHIVED_TABLES = {
+    "nutrition_logs": (
+        NutritionLog,
+        NutritionLog.datetime,
+        NUTRITION_LOG_FIELDS,
+        pa.schema([
+            ("id", pa.string()),
+            ("datetime", pa.timestamp("us")),
+            ("calories", pa.float64()),
+            ("protein", pa.float64()),
+            ("fats", pa.float64()),
+            ("carbs", pa.float64()),
+            ("description", pa.string()),
+        ]),
+    ),
+    "lab_results": (
+        LabResult,
+        LabResult.date,
+        LAB_RESULT_FIELDS,
+        pa.schema([
+            ("id", pa.string()),
+            ("date", pa.timestamp("us")),
+            ("lab_results_summary", pa.string()),
+        ]),
+    ),
+    "text_records": (
+        TextRecord,
+        TextRecord.date,
+        TEXT_RECORD_FIELDS,
+        pa.schema([
+            ("id", pa.string()),
+            ("date", pa.date32()),
+            ("ai_summary", pa.string()),
+        ]),
+    ),
+}
+
+# Upper bound on the encoded archive JSON kept in memory per process.
+CACHE_BYTES = int(os.getenv("ARCHIVE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Rows per record batch when encoding a part, bounding the Python objects
+# alive at once on a cache miss.
+ENCODE_BATCH_ROWS = 10_000
+
+# LRU of encoded archive parts, keyed by relative path: (mtime, bytes).
+# Shared by threadpool workers, so every access goes through _encoded_lock.
+_encoded_parts = OrderedDict()
+_encoded_size = 0
+_encoded_lock = threading.Lock()
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _bound(column, day: date):
+    """
+    Express a day boundary in the column's own type (DateTime or Date).
+    """
+    if column.type.python_type is datetime:
+        return datetime.combine(day, datetime.min.time())
+    return day
+
+
+def _day_of(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+@contextmanager
+def _compaction_lock():
+    """
+    Hold an exclusive lock on the archive directory for the duration of a run,
+    so overlapping runs (e.g. cron overlap) cannot interleave.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    with open(os.path.join(ARCHIVE_DIR, ".compact.lock"), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError("Another compaction run is already in progress")
+        yield
+
+
+def _rows_to_table(schema: pa.Schema, rows: list) -> pa.Table:
+    values = list(zip(*rows))
+    arrays = []
+    for field, column in zip(schema, values):
+        if field.name == "id":
+            column = [str(v) for v in column]
+        arrays.append(pa.array(column, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _read_part(path: str, columns: list = None) -> pa.Table:
+    return pq.read_table(os.path.join(ARCHIVE_DIR, path), columns=columns, memory_map=True)
+
+
+def _write_part(table_name: str, month: date, table: pa.Table) -> str:
+    """
+    Write one month of rows as a new zstd-compressed Parquet file and return its
+    path relative to ARCHIVE_DIR. The file only becomes visible to readers once
+    its archive_parts row is committed.
+    """
+    directory = os.path.join(table_name, f"{month:%Y-%m}")
+    os.makedirs(os.path.join(ARCHIVE_DIR, directory), exist_ok=True)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(directory, f"part-{stamp}.parquet")
+    pq.write_table(table, os.path.join(ARCHIVE_DIR, path), compression="zstd")
+    return path
+
+
+def _remove_orphans(session) -> None:
+    """
+    Delete part files not listed in archive_parts: leftovers of failed runs and
+    parts superseded by a month merge in the previous run. Superseded parts are
+    kept until the next run so in-flight reads of the old manifest still work.
+    """
+    committed = {path for (path,) in session.query(ArchivePart.path).all()}
+    for table_name in ARCHIVED_TABLES:
+        root = os.path.join(ARCHIVE_DIR, table_name)
+        if not os.path.isdir(root):
+            continue
+        for month in os.listdir(root):
+            for part in os.listdir(os.path.join(root, month)):
+                path = os.path.join(table_name, month, part)
+                if path not in committed:
+                    os.remove(os.path.join(ARCHIVE_DIR, path))
+
+
+def _rollup(session, table_name: str, fields, date_column, rows: list) -> None:
+    """
+    Add per-day totals for the archived rows to daily_rollups.
+    """
+    keys = [key for key, _ in fields]
+    date_index = keys.index(date_column.key)
+    nutrition = table_name == "nutrition_logs"
+    nutrient_indexes = [(key, keys.index(key)) for key in NUTRIENTS] if nutrition else []
+
+    totals = {}
+    for row in rows:
+        day = _day_of(row[date_index])
+        day_totals = totals.setdefault(day, dict.fromkeys(("record_count",) + NUTRIENTS, 0))
+        day_totals["record_count"] += 1
+        for key, index in nutrient_indexes:
+            if row[index] is not None:
+                day_totals[key] += row[index]
+
+    for day, day_totals in totals.items():
+        rollup = (
+            session.query(DailyRollup)
+            .filter(DailyRollup.date == day, DailyRollup.source == table_name)
+            .first()
+        )
+        if rollup is None:
+            rollup = DailyRollup(date=day, source=table_name, record_count=0)
+            if nutrition:
+                rollup.calories = rollup.protein = rollup.fats = rollup.carbs = 0.0
+            session.add(rollup)
+
+        rollup.record_count += day_totals["record_count"]
+        for key in NUTRIENTS if nutrition else ():
+            setattr(rollup, key, getattr(rollup, key) + day_totals[key])
+
+
+def _compact_month(session, table_name: str, month: date, horizon: date) -> int:
+    """
+    Archive one month of a table in a single transaction. The month's existing
+    parts and the new rows are merged into one replacement file, so each month
+    stays a single part no matter how often the job runs.
+    """
+    model, date_column, fields, schema = ARCHIVED_TABLES[table_name]
+    start = _bound(date_column, month)
+    end = _bound(date_column, min(_next_month(month), horizon))
+
+    rows = (
+        session.query(*columns(fields))
+        .filter(date_column >= start, date_column < end)
+        .order_by(date_column)
+        .all()
+    )
+    if not rows:
+        return 0
+
+    existing = (
+        session.query(ArchivePart)
+        .filter(ArchivePart.source == table_name, ArchivePart.month == month)
+        .all()
+    )
+    merged = pa.concat_tables(
+        [_read_part(part.path) for part in existing] + [_rows_to_table(schema, rows)]
+    )
+    path = _write_part(table_name, month, merged)
+
+    try:
+        for part in existing:
+            session.delete(part)
+        session.add(
+            ArchivePart(source=table_name, month=month, path=path, row_count=merged.num_rows)
+        )
+        _rollup(session, table_name, fields, date_column, rows)
+        (
+            session.query(model)
+            .filter(date_column >= start, date_column < end)
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+    except BaseException:
+        session.rollback()
+        os.remove(os.path.join(ARCHIVE_DIR, path))
+        raise
+
+    return len(rows)
+
+
+def compact(retention_days: int = RETENTION_DAYS, now: datetime = None) -> dict:
+    """
+    Move rows older than the retention horizon from the hot tables into
+    month-partitioned Parquet files under ARCHIVE_DIR, leaving daily rollups
+    behind. Each month is archived in its own transaction, so memory use stays
+    bounded by a single month of rows and a failure never leaves rows both
+    archived and hot.
+
+    Returns the number of rows archived per table.
+    """
+    if retention_days < MIN_RETENTION_DAYS:
+        raise ValueError(
+            f"Retention must be at least {MIN_RETENTION_DAYS} days, got {retention_days}"
+        )
+
+    now = now or datetime.now(timezone.utc)
+    horizon = (now - timedelta(days=retention_days)).date()
+
+    init_db()
+
+    archived = {}
+    with _compaction_lock():
+        session = SessionLocal()
+        try:
+            _remove_orphans(session)
+
+            for table_name, (_, date_column, _, _) in ARCHIVED_TABLES.items():
+                archived[table_name] = 0
+
+                oldest = session.query(func.min(date_column)).scalar()
+                if oldest is None:
+                    continue
+
+                month = _day_of(oldest).replace(day=1)
+                while month < horizon:
+                    archived[table_name] += _compact_month(session, table_name, month, horizon)
+                    month = _next_month(month)
+        finally:
+            session.close()
+
+    return archived
+
+
+def manifest_paths(session, table_name: str) -> list:
+    """
+    Return the committed part paths of a table, oldest month first.
+    """
+    return [
+        path
+        for (path,) in session.query(ArchivePart.path)
+        .filter(ArchivePart.source == table_name)
+        .order_by(ArchivePart.month)
+        .all()
+    ]
+
+
+def read_consistent(session, table_name: str, query) -> tuple:
+    """
+    Run a hot-table query and read the table's manifest so both reflect the
+    same compaction state. A compaction run changes both in one commit, so the
+    manifest is read before and after the query and the pair is retried if a
+    commit landed in between. Returns (paths, rows).
+    """
+    paths = manifest_paths(session, table_name)
+    while True:
+        rows = query.all()
+        latest = manifest_paths(session, table_name)
+        if latest == paths:
+            return paths, rows
+        paths = latest
+
+
+def _cache_get(path: str, mtime: float):
+    with _encoded_lock:
+        cached = _encoded_parts.get(path)
+        if cached is None or cached[0] != mtime:
+            return None
+        _encoded_parts.move_to_end(path)
+        return cached[1]
+
+
+def _cache_put(path: str, mtime: float, encoded: bytes) -> None:
+    global _encoded_size
+    if len(encoded) > CACHE_BYTES:
+        return
+    with _encoded_lock:
+        previous = _encoded_parts.pop(path, None)
+        if previous is not None:
+            _encoded_size -= len(previous[1])
+        _encoded_parts[path] = (mtime, encoded)
+        _encoded_size += len(encoded)
+        while _encoded_size > CACHE_BYTES:
+            _, (_, evicted) = _encoded_parts.popitem(last=False)
+            _encoded_size -= len(evicted)
+
+
+def _encoded_part(path: str) -> bytes:
+    """
+    Return the rows of one part as JSON array items (without the brackets).
+    Parts are encoded one record batch at a time and kept in a size-capped LRU.
+    """
+    mtime = os.path.getmtime(os.path.join(ARCHIVE_DIR, path))
+    encoded = _cache_get(path, mtime)
+    if encoded is None:
+        table = _read_part(path)
+        encoded = b",".join(
+            dumps(batch.to_pylist())[1:-1]
+            for batch in table.to_batches(max_chunksize=ENCODE_BATCH_ROWS)
+            if batch.num_rows
+        )
+        _cache_put(path, mtime, encoded)
+    return encoded
+
+
+def read_archive_json(paths: list) -> bytes:
+    """
+    Return the archived rows in the given parts (from manifest_paths or
+    read_consistent) as a JSON array keyed like the list endpoints.
+    """
+    return b"[" + b",".join(_encoded_part(path) for path in paths) + b"]"
+
+
+def read_archive_rows(table_name: str, paths: list, fields, newest: int = None) -> list:
+    """
+    Return archived rows as dicts for a projection over the archived columns,
+    e.g. LAB_RESULT_SUMMARY_FIELDS; only the projected columns are read.
+    Rows come oldest first, or with newest=n the n most recent rows, newest
+    first, reading back from the latest part only as far as needed.
+    """
+    keys = [key for key, _ in fields]
+    names = [column.key for _, column in fields]
+    date_name = ARCHIVED_TABLES[table_name][1].key
+
+    if newest is None:
+        tables = [_read_part(path, names) for path in paths]
+    else:
+        tables = []
+        remaining = newest
+        for path in reversed(paths):
+            if remaining <= 0:
+                break
+            table = _read_part(path, names).sort_by([(date_name, "descending")])
+            table = table.slice(0, remaining)
+            tables.append(table)
+            remaining -= table.num_rows
+
+    rows = []
+    for table in tables:
+        rows.extend(table.rename_columns(keys).to_pylist())
+    return rows
+
+
+if __name__ == "__main__":
+    print(compact())
@@ -2,6 +2,7 @@ from sys import builtin_module_names
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from enum import Enum
@@ -14,7 +15,20 @@ import json
 from dotenv import load_dotenv
 
 from .database import init_db, SessionLocal
-from .models import NutritionLog, LabResult, TextRecord
+from .models import NutritionLog, LabResult, TextRecord, DailyRollup
+from .archive import read_consistent, read_archive_json, read_archive_rows
+from .serialization import (
+    NUTRITION_LOG_FIELDS,
+    LAB_RESULT_FIELDS,
+    TEXT_RECORD_FIELDS,
+    LAB_RESULT_SUMMARY_FIELDS,
+    TEXT_RECORD_SUMMARY_FIELDS,
+    DAILY_ROLLUP_FIELDS,
+    columns,
+    rows_to_dicts,
+    dumps,
+    json_array_response,
+)
 
 # Load environment variables from the project root
 load_dotenv()
@@ -287,45 +301,45 @@ async def ai_insights():
     # Collect all relevant health data from the database
     session = SessionLocal()
     try:
-        nutrition_logs = session.query(NutritionLog).all()
-        lab_results = session.query(LabResult).all()
-        text_records = session.query(TextRecord).all()
+        nutrition_logs = session.query(*columns(NUTRITION_LOG_FIELDS[1:])).all()
+        lab_paths, lab_results = read_consistent(
+            session, "lab_results", session.query(*columns(LAB_RESULT_SUMMARY_FIELDS[1:]))
+        )
+        text_paths, text_records = read_consistent(
+            session, "text_records", session.query(*columns(TEXT_RECORD_SUMMARY_FIELDS[1:]))
+        )
+        # Archived meals are represented by their daily rollups
+        daily_rollups = (
+            session.query(*columns(DAILY_ROLLUP_FIELDS))
+            .filter(DailyRollup.source == "nutrition_logs")
+            .order_by(DailyRollup.date)
+            .all()
+        )
     finally:
         session.close()
 
+    # Lab results and notes are read in full, archived history first
+    lab_results = (
+        await run_in_threadpool(read_archive_rows, "lab_results", lab_paths, LAB_RESULT_SUMMARY_FIELDS[1:])
+        + rows_to_dicts(LAB_RESULT_SUMMARY_FIELDS[1:], lab_results)
+    )
+    text_records = (
+        await run_in_threadpool(read_archive_rows, "text_records", text_paths, TEXT_RECORD_SUMMARY_FIELDS[1:])
+        + rows_to_dicts(TEXT_RECORD_SUMMARY_FIELDS[1:], text_records)
+    )
+
     # If no data logged yet, return default message
-    if not nutrition_logs and not lab_results and not text_records:
+    if not nutrition_logs and not lab_results and not text_records and not daily_rollups:
         return {"summary": "Start logging your meals, health notes, and lab results to receive personalized health insights. Your AI assistant will analyze your data and provide recommendations every hour."}
 
     db_info = {
-        "nutrition_logs": [
-            {
-                "datetime": log.datetime.isoformat() if log.datetime else None,
-                "calories": log.calories,
-                "protein": log.protein,
-                "fats": log.fats,
-                "carbs": log.carbs,
-                "description": log.description,
-            }
-            for log in nutrition_logs
-        ],
-        "lab_results": [
-            {
-                "date": result.date.isoformat() if result.date else None,
-                "summary": result.lab_results_summary,
-            }
-            for result in lab_results
-        ],
-        "text_records": [
-            {
-                "date": record.date.isoformat() if record.date else None,
-                "summary": record.ai_summary,
-            }
-            for record in text_records
-        ],
+        "nutrition_logs": rows_to_dicts(NUTRITION_LOG_FIELDS[1:], nutrition_logs),
+        "lab_results": lab_results,
+        "text_records": text_records,
+        "daily_rollups": rows_to_dicts(DAILY_ROLLUP_FIELDS, daily_rollups),
     }
 
-    db_info_str = json.dumps(db_info)
+    db_info_str = dumps(db_info).decode()
 
     try:
         gemini_api_key = GEMINI_API_KEY 
@@ -333,7 +347,7 @@ async def ai_insights():
         prompt = f'''You are a health Assistant that receives structured data about the user's various health related information from a database, your task is to convert it into insights and suggestions if needed that would be usefull for the user . Remember that you are talking to the user Directly, so keep your insights brief (1-2 sentence) and understandable. Your insights should be 200 words at most and should be in the schema below:
         summary: str (summary of the user input)
 
-        db_info (JSON with nutrition logs, lab results, and text records):
+        db_info (JSON with nutrition logs, lab results, text records, and daily rollups of older archived meals):
         {db_info_str}
         '''
         content = [prompt]
@@ -358,58 +372,39 @@ async def ai_insights():
 async def get_nutrition_logs():
     session = SessionLocal()
     try:
-        logs = session.query(NutritionLog).all()
+        paths, logs = read_consistent(session, "nutrition_logs", session.query(*columns(NUTRITION_LOG_FIELDS)))
     finally:
         session.close()
 
-    return [
-        {
-            "id": str(log.id),
-            "datetime": log.datetime.isoformat() if log.datetime else None,
-            "calories": log.calories,
-            "protein": log.protein,
-            "fats": log.fats,
-            "carbs": log.carbs,
-            "description": log.description,
-        }
-        for log in logs
-    ]
+    # Archived rows come first, followed by the hot table
+    archived = await run_in_threadpool(read_archive_json, paths)
+    return json_array_response(archived, dumps(rows_to_dicts(NUTRITION_LOG_FIELDS, logs)))
 
 
 @app.get("/lab_results")
 async def get_lab_results():
     session = SessionLocal()
     try:
-        results = session.query(LabResult).all()
+        paths, results = read_consistent(session, "lab_results", session.query(*columns(LAB_RESULT_FIELDS)))
     finally:
         session.close()
 
-    return [
-        {
-            "id": str(result.id),
-            "date": result.date.isoformat() if result.date else None,
-            "lab_results_summary": result.lab_results_summary,
-        }
-        for result in results
-    ]
+    # Archived rows come first, followed by the hot table
+    archived = await run_in_threadpool(read_archive_json, paths)
+    return json_array_response(archived, dumps(rows_to_dicts(LAB_RESULT_FIELDS, results)))
 
 
 @app.get("/text_records")
 async def get_text_records():
     session = SessionLocal()
     try:
-        records = session.query(TextRecord).all()
+        paths, records = read_consistent(session, "text_records", session.query(*columns(TEXT_RECORD_FIELDS)))
     finally:
         session.close()
 
-    return [
-        {
-            "id": str(record.id),
-            "date": record.date.isoformat() if record.date else None,
-            "ai_summary": record.ai_summary,
-        }
-        for record in records
-    ]
+    # Archived rows come first, followed by the hot table
+    archived = await run_in_threadpool(read_archive_json, paths)
+    return json_array_response(archived, dumps(rows_to_dicts(TEXT_RECORD_FIELDS, records)))
 
 
 @app.get("/daily_calorie")
@@ -465,61 +460,48 @@ def db_index() -> str:
     session = SessionLocal()
     try:
         nutrition_logs = (
-            session.query(NutritionLog)
+            session.query(*columns(NUTRITION_LOG_FIELDS))
             .filter(NutritionLog.datetime >= seven_days_ago)
             .order_by(NutritionLog.datetime.desc())
             .all()
         )
 
-        text_records = (
-            session.query(TextRecord)
+        text_paths, text_records = read_consistent(
+            session,
+            "text_records",
+            session.query(*columns(TEXT_RECORD_SUMMARY_FIELDS))
             .order_by(TextRecord.date.desc())
-            .limit(7)
-            .all()
+            .limit(7),
         )
 
-        lab_results = (
-            session.query(LabResult)
+        lab_paths, lab_results = read_consistent(
+            session,
+            "lab_results",
+            session.query(*columns(LAB_RESULT_SUMMARY_FIELDS))
             .order_by(LabResult.date.desc())
-            .limit(7)
-            .all()
+            .limit(7),
         )
     finally:
         session.close()
 
+    # Archived rows are older than any hot row, so they only fill up the last 7
+    text_records = rows_to_dicts(TEXT_RECORD_SUMMARY_FIELDS, text_records)
+    text_records += read_archive_rows(
+        "text_records", text_paths, TEXT_RECORD_SUMMARY_FIELDS, newest=7 - len(text_records)
+    )
+    lab_results = rows_to_dicts(LAB_RESULT_SUMMARY_FIELDS, lab_results)
+    lab_results += read_archive_rows(
+        "lab_results", lab_paths, LAB_RESULT_SUMMARY_FIELDS, newest=7 - len(lab_results)
+    )
+
     data = {
-        "nutrition_logs": [
-            {
-                "id": str(log.id),
-                "datetime": log.datetime.isoformat() if log.datetime else None,
-                "calories": log.calories,
-                "protein": log.protein,
-                "fats": log.fats,
-                "carbs": log.carbs,
-                "description": log.description,
-            }
-            for log in nutrition_logs
-        ],
-        "text_records": [
-            {
-                "id": str(record.id),
-                "date": record.date.isoformat() if record.date else None,
-                "summary": record.ai_summary,
-            }
-            for record in text_records
-        ],
-        "lab_results": [
-            {
-                "id": str(result.id),
-                "date": result.date.isoformat() if result.date else None,
-                "summary": result.lab_results_summary,
-            }
-            for result in lab_results
-        ],
+        "nutrition_logs": rows_to_dicts(NUTRITION_LOG_FIELDS, nutrition_logs),
+        "text_records": text_records,
+        "lab_results": lab_results,
     }
 
     # Return as a plain string, as requested
-    return json.dumps(data)
+    return dumps(data).decode()
 
 @app.get("/health_index")
 async def health_index():
@@ -558,7 +540,7 @@ async def food_index():
     session = SessionLocal()
     try:
         nutrition_logs = (
-            session.query(NutritionLog)
+            session.query(*columns(NUTRITION_LOG_FIELDS))
             .filter(NutritionLog.datetime >= seven_days_ago)
             .order_by(NutritionLog.datetime.desc())
             .all()
@@ -570,20 +552,7 @@ async def food_index():
     if not nutrition_logs:
         return {"food_index": 5.0}
 
-    foods_data = [
-        {
-            "id": str(log.id),
-            "datetime": log.datetime.isoformat() if log.datetime else None,
-            "calories": log.calories,
-            "protein": log.protein,
-            "fats": log.fats,
-            "carbs": log.carbs,
-            "description": log.description,
-        }
-        for log in nutrition_logs
-    ]
-
-    foods = json.dumps(foods_data)
+    foods = dumps(rows_to_dicts(NUTRITION_LOG_FIELDS, nutrition_logs)).decode()
     try:
         gemini_api_key = GEMINI_API_KEY 
         client = genai.Client(api_key=gemini_api_key)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Float, DateTime, Date
+from sqlalchemy import Column, String, Text, Float, DateTime, Date, Integer, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime, date, timezone
@@ -48,3 +48,36 @@ class TextRecord(Base):
     date       = Column(Date, nullable=False, default=date.today)
     ai_summary = Column(Text, nullable=True)           # AI summary of the raw text
 
+
+class DailyRollup(Base):
+    """
+    Table 4: daily_rollups
+    Per-day totals left behind when raw rows are moved to the archive.
+    """
+    __tablename__ = "daily_rollups"
+    __table_args__ = (UniqueConstraint("date", "source"),)
+
+    id           = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    date         = Column(Date, nullable=False, index=True)
+    source       = Column(String, nullable=False)         # table the rows were archived from
+    record_count = Column(Integer, nullable=False, default=0)
+    calories     = Column(Float, nullable=True)           # nutrition_logs only
+    protein      = Column(Float, nullable=True)           # grams, nutrition_logs only
+    fats         = Column(Float, nullable=True)           # grams, nutrition_logs only
+    carbs        = Column(Float, nullable=True)           # grams, nutrition_logs only
+
+
+class ArchivePart(Base):
+    """
+    Table 5: archive_parts
+    Manifest of committed archive files. Readers only open files listed here,
+    so a part written by a failed compaction run is never visible.
+    """
+    __tablename__ = "archive_parts"
+
+    id         = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    source     = Column(String, nullable=False, index=True)   # table the rows were archived from
+    month      = Column(Date, nullable=False)                 # first day of the partition month
+    path       = Column(String, nullable=False, unique=True)   # relative to ARCHIVE_DIR
+    row_count  = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,91 @@
+from typing import Iterable, Sequence, Tuple
+
+import orjson
+from fastapi import Response
+
+from .models import NutritionLog, LabResult, TextRecord, DailyRollup
+
+
+# Each projection is an ordered list of (json key, column) pairs. Queries select
+# only these columns, so rows come back as plain tuples instead of ORM objects,
+# and the keys are zipped onto them without any per-row attribute access.
+NUTRITION_LOG_FIELDS = (
+    ("id", NutritionLog.id),
+    ("datetime", NutritionLog.datetime),
+    ("calories", NutritionLog.calories),
+    ("protein", NutritionLog.protein),
+    ("fats", NutritionLog.fats),
+    ("carbs", NutritionLog.carbs),
+    ("description", NutritionLog.description),
+)
+
+LAB_RESULT_FIELDS = (
+    ("id", LabResult.id),
+    ("date", LabResult.date),
+    ("lab_results_summary", LabResult.lab_results_summary),
+)
+
+TEXT_RECORD_FIELDS = (
+    ("id", TextRecord.id),
+    ("date", TextRecord.date),
+    ("ai_summary", TextRecord.ai_summary),
+)
+
+DAILY_ROLLUP_FIELDS = (
+    ("date", DailyRollup.date),
+    ("source", DailyRollup.source),
+    ("record_count", DailyRollup.record_count),
+    ("calories", DailyRollup.calories),
+    ("protein", DailyRollup.protein),
+    ("fats", DailyRollup.fats),
+    ("carbs", DailyRollup.carbs),
+)
+
+# Prompt-facing variants used by db_index() and ai_insights, which expose the
+# summary text under a common "summary" key.
+LAB_RESULT_SUMMARY_FIELDS = (
+    ("id", LabResult.id),
+    ("date", LabResult.date),
+    ("summary", LabResult.lab_results_summary),
+)
+
+TEXT_RECORD_SUMMARY_FIELDS = (
+    ("id", TextRecord.id),
+    ("date", TextRecord.date),
+    ("summary", TextRecord.ai_summary),
+)
+
+
+def columns(fields: Sequence[Tuple[str, object]]) -> list:
+    """
+    Return the columns of a projection, ready to pass to session.query(*...).
+    """
+    return [column for _, column in fields]
+
+
+def rows_to_dicts(fields: Sequence[Tuple[str, object]], rows: Iterable) -> list:
+    """
+    Pair each selected row with the projection's keys.
+    UUIDs, datetimes and dates are left as-is for orjson to encode natively.
+    """
+    keys = [key for key, _ in fields]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def dumps(data) -> bytes:
+    """
+    Encode data to JSON bytes in a single pass.
+    orjson writes UUIDs as canonical strings and dates/datetimes as ISO 8601,
+    matching the previous str(...) / .isoformat() output.
+    """
+    return orjson.dumps(data)
+
+
+def json_array_response(*arrays: bytes) -> Response:
+    """
+    Return one JSON array response made of several pre-encoded JSON arrays,
+    joined at the byte level. This bypasses FastAPI's jsonable_encoder and
+    never decodes the arrays again.
+    """
+    items = [array[1:-1] for array in arrays if len(array) > 2]
+    return Response(content=b"[" + b",".join(items) + b"]", media_type="application/json")
@@ -0,0 +1,116 @@
+"""
+Benchmark the list-endpoint serialization paths on a seeded SQLite database.
+
+    python -m benchmarks.serialization [ROWS ...]
+
+"old" is the path /nutrition_logs used before column projections: hydrate
+NutritionLog objects, build a dict per row with str(id) / isoformat(), then
+FastAPI's jsonable_encoder and JSONResponse rendering. "new" is the current
+path: select the projected columns as tuples and encode them with orjson.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, NutritionLog
+from app.serialization import NUTRITION_LOG_FIELDS, columns, rows_to_dicts, dumps
+
+
+SEED_BATCH = 50_000
+
+
+def _uuid() -> uuid.UUID:
+    # The UUID column has NUMERIC affinity on SQLite, so a hex like "1234e56..."
+    # would be stored as a REAL and fail to load; skip those ids when seeding.
+    while True:
+        value = uuid.uuid4()
+        if not value.hex.replace("e", "", 1).isdigit():
+            return value
+
+
+def seed(session, rows: int) -> None:
+    start = datetime(2024, 1, 1)
+    for offset in range(0, rows, SEED_BATCH):
+        session.execute(
+            insert(NutritionLog),
+            [
+                {
+                    "id": _uuid(),
+                    "datetime": start + timedelta(minutes=i),
+                    "calories": 512.0,
+                    "protein": 31.5,
+                    "fats": 12.0,
+                    "carbs": 60.25,
+                    "description": "oatmeal with berries and nuts",
+                }
+                for i in range(offset, min(offset + SEED_BATCH, rows))
+            ],
+        )
+    session.commit()
+
+
+def old_path(session) -> bytes:
+    logs = session.query(NutritionLog).all()
+    content = [
+        {
+            "id": str(log.id),
+            "datetime": log.datetime.isoformat() if log.datetime else None,
+            "calories": log.calories,
+            "protein": log.protein,
+            "fats": log.fats,
+            "carbs": log.carbs,
+            "description": log.description,
+        }
+        for log in logs
+    ]
+    # Same encoding FastAPI applies to a returned list (JSONResponse.render)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def new_path(session) -> bytes:
+    logs = session.query(*columns(NUTRITION_LOG_FIELDS)).all()
+    return dumps(rows_to_dicts(NUTRITION_LOG_FIELDS, logs))
+
+
+def run(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        session = Session()
+        seed(session, rows)
+        session.close()
+
+        results = {}
+        for name, path in (("old", old_path), ("new", new_path)):
+            # Fresh session per run so the identity map doesn't carry over
+            session = Session()
+            started = time.perf_counter()
+            body = path(session)
+            elapsed = time.perf_counter() - started
+            session.close()
+            results[name] = json.loads(body)
+            print(f"{rows:>9} rows  {name}: {elapsed:8.2f}s  {rows / elapsed:>12,.0f} rows/s")
+
+        assert results["old"] == results["new"], "old and new paths disagree"
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    for rows in [int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000]:
+        run(rows)
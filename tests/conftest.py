@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before app.database is imported.
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
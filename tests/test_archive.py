@@ -0,0 +1,181 @@
+import glob
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import archive, main
+from app.database import engine, SessionLocal
+from app.models import Base, NutritionLog, LabResult, TextRecord, DailyRollup, ArchivePart
+from app.serialization import NUTRITION_LOG_FIELDS, columns
+
+
+NOW = datetime(2026, 10, 19, 12)
+LIST_ENDPOINTS = ("/nutrition_logs", "/lab_results", "/text_records")
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(tmp_path, monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    archive._encoded_parts.clear()
+    monkeypatch.setattr(archive, "_encoded_size", 0)
+
+
+def seed(days_ago):
+    session = SessionLocal()
+    try:
+        for days in days_ago:
+            when = NOW - timedelta(days=days)
+            session.add(NutritionLog(datetime=when, calories=100.0, protein=10.0, fats=None, carbs=5.0, description=f"meal {days}"))
+            session.add(LabResult(date=when, lab_results_summary=f"lab {days}"))
+            session.add(TextRecord(date=when.date(), ai_summary=f"note {days}"))
+        session.commit()
+    finally:
+        session.close()
+
+
+def list_bodies():
+    client = TestClient(main.app)
+    return {endpoint: client.get(endpoint).content for endpoint in LIST_ENDPOINTS}
+
+
+def test_compact_round_trip():
+    seed([200, 200, 199, 150, 100, 3])
+    before = list_bodies()
+
+    archived = archive.compact(retention_days=90, now=NOW)
+
+    assert archived == {"nutrition_logs": 5, "lab_results": 5, "text_records": 5}
+    assert list_bodies() == before
+
+    session = SessionLocal()
+    try:
+        assert session.query(NutritionLog).count() == 1
+        assert session.query(LabResult).count() == 1
+        assert session.query(TextRecord).count() == 1
+
+        day = (NOW - timedelta(days=200)).date()
+        rollup = (
+            session.query(DailyRollup)
+            .filter(DailyRollup.date == day, DailyRollup.source == "nutrition_logs")
+            .one()
+        )
+        assert rollup.record_count == 2
+        assert rollup.calories == 200.0
+        assert rollup.protein == 20.0
+        assert rollup.fats == 0.0
+        assert rollup.carbs == 10.0
+        assert session.query(DailyRollup).filter(DailyRollup.source == "text_records").count() == 4
+    finally:
+        session.close()
+
+    # A second run with nothing past the horizon is a no-op
+    assert archive.compact(retention_days=90, now=NOW) == {
+        "nutrition_logs": 0, "lab_results": 0, "text_records": 0,
+    }
+    assert list_bodies() == before
+
+
+def test_later_runs_merge_into_one_part_per_month():
+    seed([120])
+    archive.compact(retention_days=90, now=NOW)
+    seed([119])
+    before = list_bodies()
+
+    archive.compact(retention_days=90, now=NOW)
+    archive.compact(retention_days=90, now=NOW)  # sweeps the superseded part
+
+    assert list_bodies() == before
+    session = SessionLocal()
+    try:
+        parts = session.query(ArchivePart).filter(ArchivePart.source == "nutrition_logs").all()
+    finally:
+        session.close()
+    assert [part.row_count for part in parts] == [2]
+    assert len(glob.glob(os.path.join(archive.ARCHIVE_DIR, "nutrition_logs", "*", "*.parquet"))) == 1
+
+
+def test_failed_compaction_leaves_hot_tables_and_archive_untouched(monkeypatch):
+    seed([200, 3])
+    before = list_bodies()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(archive, "_rollup", fail)
+    with pytest.raises(RuntimeError):
+        archive.compact(retention_days=90, now=NOW)
+
+    assert list_bodies() == before
+    session = SessionLocal()
+    try:
+        assert session.query(NutritionLog).count() == 2
+        assert session.query(ArchivePart).count() == 0
+        assert session.query(DailyRollup).count() == 0
+    finally:
+        session.close()
+    assert glob.glob(os.path.join(archive.ARCHIVE_DIR, "*", "*", "*.parquet")) == []
+
+
+def test_retention_shorter_than_hot_window_is_rejected():
+    seed([3])
+    with pytest.raises(ValueError):
+        archive.compact(retention_days=archive.MIN_RETENTION_DAYS - 1, now=NOW)
+
+
+def test_overlapping_runs_are_refused():
+    with archive._compaction_lock():
+        with pytest.raises(RuntimeError):
+            archive.compact(retention_days=90, now=NOW)
+
+
+def test_db_index_keeps_archived_history():
+    seed([300, 200, 120])
+    before = main.db_index()
+
+    archive.compact(retention_days=90, now=NOW)
+
+    assert main.db_index() == before
+    assert len(json.loads(before)["lab_results"]) == 3
+
+
+def test_read_consistent_retries_when_compaction_commits_mid_read():
+    seed([200, 3])
+    session = SessionLocal()
+    try:
+        query = session.query(*columns(NUTRITION_LOG_FIELDS))
+
+        class CompactBeforeFirstRead:
+            ran = False
+
+            def all(self):
+                if not self.ran:
+                    self.ran = True
+                    archive.compact(retention_days=90, now=NOW)
+                return query.all()
+
+        paths, rows = archive.read_consistent(session, "nutrition_logs", CompactBeforeFirstRead())
+    finally:
+        session.close()
+
+    archived = json.loads(archive.read_archive_json(paths))
+    ids = [row["id"] for row in archived] + [str(row[0]) for row in rows]
+    assert len(ids) == len(set(ids)) == 2
+
+
+def test_encoded_cache_stays_within_its_byte_cap(monkeypatch):
+    seed([200, 150, 100])
+    archive.compact(retention_days=90, now=NOW)
+    before = list_bodies()
+
+    monkeypatch.setattr(archive, "CACHE_BYTES", 400)
+    archive._encoded_parts.clear()
+    monkeypatch.setattr(archive, "_encoded_size", 0)
+
+    assert list_bodies() == before
+    assert archive._encoded_size <= archive.CACHE_BYTES
+    assert archive._encoded_size == sum(len(encoded) for _, encoded in archive._encoded_parts.values())
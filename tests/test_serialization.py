@@ -0,0 +1,101 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models import NutritionLog, LabResult, TextRecord
+from app.serialization import (
+    NUTRITION_LOG_FIELDS,
+    LAB_RESULT_FIELDS,
+    TEXT_RECORD_FIELDS,
+    rows_to_dicts,
+    dumps,
+)
+
+
+def old_encode(content) -> bytes:
+    # What the list endpoints produced before projections: a hand-built dict
+    # per row, then FastAPI's jsonable_encoder and JSONResponse rendering.
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def new_encode(fields, objects) -> bytes:
+    rows = [tuple(getattr(obj, column.key) for _, column in fields) for obj in objects]
+    return dumps(rows_to_dicts(fields, rows))
+
+
+DATETIMES = [
+    None,
+    datetime(2026, 3, 1, 8, 30),
+    datetime(2026, 3, 1, 8, 30, 0, 123456),
+    datetime(2026, 3, 1, 8, 30, tzinfo=timezone.utc),
+    datetime(2026, 3, 1, 8, 30, 15, 500, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+]
+
+TEXTS = [None, "", "plain", "crème brûlée, 寿司 & 🍓", 'quote " backslash \\ newline \n tab \t']
+
+
+def test_nutrition_logs_encoding_matches_old_path():
+    logs = [
+        NutritionLog(
+            id=uuid.uuid4(),
+            datetime=when,
+            calories=calories,
+            protein=31.5,
+            fats=None,
+            carbs=0.1,
+            description=text,
+        )
+        for when, text, calories in zip(DATETIMES, TEXTS, [None, 0.0, 512.0, 1234.5678, 3.0])
+    ]
+    old = old_encode([
+        {
+            "id": str(log.id),
+            "datetime": log.datetime.isoformat() if log.datetime else None,
+            "calories": log.calories,
+            "protein": log.protein,
+            "fats": log.fats,
+            "carbs": log.carbs,
+            "description": log.description,
+        }
+        for log in logs
+    ])
+    assert new_encode(NUTRITION_LOG_FIELDS, logs) == old
+
+
+def test_lab_results_encoding_matches_old_path():
+    results = [
+        LabResult(id=uuid.uuid4(), date=when, lab_results_summary=text)
+        for when, text in zip(DATETIMES, TEXTS)
+    ]
+    old = old_encode([
+        {
+            "id": str(result.id),
+            "date": result.date.isoformat() if result.date else None,
+            "lab_results_summary": result.lab_results_summary,
+        }
+        for result in results
+    ])
+    assert new_encode(LAB_RESULT_FIELDS, results) == old
+
+
+@pytest.mark.parametrize("day", [None, date(2026, 3, 1), date(1999, 12, 31)])
+def test_text_records_encoding_matches_old_path(day):
+    records = [TextRecord(id=uuid.uuid4(), date=day, ai_summary=text) for text in TEXTS]
+    old = old_encode([
+        {
+            "id": str(record.id),
+            "date": record.date.isoformat() if record.date else None,
+            "ai_summary": record.ai_summary,
+        }
+        for record in records
+    ])
+    assert new_encode(TEXT_RECORD_FIELDS, records) == old